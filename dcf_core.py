@@ -0,0 +1,158 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import streamlit as st
+import pandas as pd
+import numpy as np
+
+
+# ---------------- SESIÓN HTTP ----------------
+@st.cache_resource
+def _http_session():
+    # Importaciones diferidas: solo hacen falta al pedir datos, no en el primer render
+    import requests_cache
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    # Sesión compartida entre reruns y tickers: reutiliza conexiones y cookies/crumb de Yahoo.
+    # Las respuestas GET se guardan en SQLite y sobreviven a reinicios del servidor.
+    session = requests_cache.CachedSession(
+        ".yf_http_cache",
+        backend="sqlite",
+        expire_after=3600,
+        allowable_methods=("GET",)
+    )
+    # Reintentos breves ante errores de conexión y respuestas 429/5xx transitorias de Yahoo
+    session.mount("https://", HTTPAdapter(max_retries=Retry(
+        total=2,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        raise_on_status=False
+    )))
+    return session
+
+
+# ---------------- FUNCIÓN DATOS FINANCIEROS ----------------
+# Etiquetas posibles de cada fila del cashflow, en orden de preferencia (yfinance actual y legado)
+OCF_ROW_NAMES = pd.Index(["Operating Cash Flow", "Total Cash From Operating Activities"])
+CAPEX_ROW_NAMES = pd.Index(["Capital Expenditure", "Capital Expenditures"])
+
+
+def _first_row(cf, names):
+    # Una sola intersección de índices en lugar de sondear cada nombre con `in`
+    hits = names.intersection(cf.index, sort=False)
+    return hits[0] if len(hits) else None
+
+
+def _missing_to_none(value):
+    # fast_info puede devolver None o NaN (p. ej. historial de precios vacío): ambos cuentan como ausentes
+    return None if value is None or math.isnan(value) else value
+
+
+def _fetch_quote(stock):
+    # fast_info es perezoso: leer los campos aquí dispara la petición dentro del hilo
+    fast = stock.fast_info
+    return _missing_to_none(fast.last_price), _missing_to_none(fast.shares)
+
+
+@st.cache_data(ttl=3600)
+def get_financial_data(ticker):
+    import yfinance as yf  # importación diferida: solo se paga al pedir datos
+
+    try:
+        stock = yf.Ticker(ticker, session=_http_session())
+
+        # Cotización y cashflow son peticiones independientes: se lanzan en paralelo
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            quote_future = executor.submit(_fetch_quote, stock)
+            cf_future = executor.submit(lambda: stock.cashflow)
+
+        # Datos básicos (fast_info evita descargar el quoteSummary completo de .info)
+        last_price, shares = quote_future.result()
+        if not last_price or not shares:
+            # Solo si a fast_info le falta algún campo se descarga el quoteSummary completo
+            info = stock.get_info()
+            last_price = last_price or info.get("currentPrice") or info.get("regularMarketPrice")
+            shares = shares or info.get("sharesOutstanding")
+        current_price = last_price or 100.0
+        shares_outstanding = shares or 1_000_000
+
+        # Estimación inicial de FCF (5% del Market Cap)
+        fcf = current_price * shares_outstanding * 0.05
+
+        # Intentar calcular FCF desde cashflow
+        try:
+            cf = cf_future.result()
+            if not cf.empty:
+                latest = cf.iloc[:, 0]
+                # Búsqueda vectorizada (sin distinguir mayúsculas) del FCF reportado por Yahoo
+                reported = latest[cf.index.str.contains("free cash flow", case=False, regex=False, na=False)]
+                ocf_row = _first_row(cf, OCF_ROW_NAMES)
+                capex_row = _first_row(cf, CAPEX_ROW_NAMES)
+                reported_fcf = float(reported.iat[0]) if len(reported) else math.nan
+                if not math.isnan(reported_fcf):
+                    fcf = reported_fcf
+                elif ocf_row is not None and capex_row is not None:
+                    # Ambas filas del ejercicio más reciente en una sola búsqueda
+                    op_cf, capex = latest.reindex([ocf_row, capex_row]).to_numpy(dtype=float)
+                    if not (math.isnan(op_cf) or math.isnan(capex)):
+                        fcf = op_cf + capex  # FCF = OCF - CAPEX
+        except Exception:
+            pass
+
+        return {
+            "current_price": float(current_price),
+            "shares_outstanding": float(shares_outstanding),
+            "fcf": float(fcf)
+        }
+    except Exception as e:
+        st.error(f"Error obteniendo datos financieros: {e}")
+        return None
+
+
+# ---------------- FUNCIÓN DCF ----------------
+@dataclass(frozen=True, slots=True)
+class DcfResult:
+    intrinsic_value: float
+    enterprise_value: float
+    future_cash_flows: np.ndarray
+    present_values: np.ndarray
+    terminal_value: float
+
+
+def _dcf_core(current_fcf, growth_rate, terminal_growth, discount_rate, years):
+    # Núcleo numérico puro (sin Streamlit): proyección, descuento y valor terminal
+    # (1+g)^t acumulado con productos sucesivos en lugar de potencias por año
+    future_cash_flows = current_fcf * np.cumprod(np.full(years, 1 + growth_rate))
+    terminal_value = future_cash_flows[-1] * (1 + terminal_growth) / (discount_rate - terminal_growth)
+
+    # (1+r)^t acumulado: un producto por año en lugar de una potencia independiente
+    discount_factors = np.cumprod(np.full(years, 1 + discount_rate))
+    present_values = future_cash_flows / discount_factors
+    terminal_pv = terminal_value / discount_factors[-1]
+
+    enterprise_value = float(present_values.sum()) + terminal_pv
+    return future_cash_flows, present_values, terminal_value, enterprise_value
+
+
+def dcf_valuation(current_fcf, growth_rate, terminal_growth, discount_rate, years, shares):
+    try:
+        if current_fcf <= 0 or shares <= 0 or terminal_growth >= discount_rate:
+            return None
+
+        future_cash_flows, present_values, terminal_value, enterprise_value = _dcf_core(
+            current_fcf, growth_rate, terminal_growth, discount_rate, years
+        )
+        intrinsic_value = enterprise_value / shares
+
+        return DcfResult(
+            intrinsic_value=intrinsic_value,
+            enterprise_value=enterprise_value,
+            future_cash_flows=future_cash_flows,
+            present_values=present_values,
+            terminal_value=terminal_value
+        )
+    except Exception as e:
+        st.error(f"Error en cálculo DCF: {e}")
+        return None